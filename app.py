@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import platform
-from bingo_core import BingoValidator, BingoCardGenerator, BingoGameEngine, BingoMode
+import os
+from bingo_core import BingoValidator, BingoMode, BingoSimulator, EstimatorMode
+from bingo_service import BingoServiceClient, make_cell, DEFAULT_PORT
+from bingo_surface import BingoLookupSurface, DEFAULT_SURFACE_PATH
 
 # ==========================================
 # ตั้งค่าเบื้องต้นของหน้าเว็บ (Page Config)
@@ -14,6 +16,20 @@ st.set_page_config(
     layout="wide"
 )
 
+# ==========================================
+# โหลดตารางค่าสำเร็จรูป (ครั้งเดียวต่อ Server)
+# ==========================================
+@st.cache_resource(max_entries=1)
+def _load_lookup_surface(path, mtime):
+    """mtime เป็นส่วนหนึ่งของ Cache Key: ไฟล์ที่สร้างใหม่ / build ต่อจนเสร็จ จะถูกโหลดใหม่อัตโนมัติ"""
+    return BingoLookupSurface.load(path)
+
+def load_lookup_surface(path=DEFAULT_SURFACE_PATH):
+    """โหลดไฟล์จาก `python bingo_surface.py build` ถ้ายังไม่มีไฟล์ให้คืน None (ไม่ Cache ผลนี้)"""
+    if not os.path.exists(path):
+        return None
+    return _load_lookup_surface(path, os.path.getmtime(path))
+
 # ==========================================
 # คลาสหลักสำหรับ Web Application
 # ==========================================
@@ -85,9 +101,32 @@ class BingoWebApp:
         
         mode_label = st.sidebar.radio("โหมดกติกา:", ["Pure Math (เต็มตาราง)", "Free Space (มีช่องฟรี)"])
         mode_key = BingoMode.PURE_MATH if "Pure" in mode_label else BingoMode.FREE_SPACE
+
+        self.render_live_estimate(n_vals, y_vals, x_vals, mode_key)
+
+        # --- Estimator (ตัวประมาณค่าแบบลดความแปรปรวน) ---
+        estimator_options = {
+            "มาตรฐาน (สุ่มอิสระ)": EstimatorMode.STANDARD,
+            "Antithetic (คู่ลำดับกลับด้าน)": EstimatorMode.ANTITHETIC,
+            "Stratified (แบ่งชั้นรอบที่การ์ดใบแรกถูกขานครบ)": EstimatorMode.STRATIFIED,
+        }
+        estimator_label = st.sidebar.selectbox("ตัวประมาณค่า (Estimator):", list(estimator_options.keys()),
+                                               help="Antithetic / Stratified ช่วยลดจำนวนเกมได้เฉพาะเมื่อผู้เล่นน้อย "
+                                                    "(ราว 1-2 คน) ถ้าผู้เล่นมาก ผลจะใกล้เคียงแบบมาตรฐาน")
+        estimator = estimator_options[estimator_label]
+        strata = 10
+        if estimator == EstimatorMode.STRATIFIED:
+            strata = st.sidebar.number_input("จำนวนชั้น (Strata):", min_value=2, value=10, step=1)
         
         append_data = st.sidebar.checkbox("สะสมข้อมูลต่อเนื่อง (ไม่ล้างค่าเดิม)", value=False)
 
+        # --- Simulation Service (ถ้าเปิด bingo_service.py ไว้ในเครื่อง) ---
+        use_service = st.sidebar.checkbox("ใช้ Simulation Service (localhost)", value=False)
+        service_port = DEFAULT_PORT
+        if use_service:
+            service_port = st.sidebar.number_input("Port ของ Service:", min_value=1, max_value=65535,
+                                                   value=DEFAULT_PORT, step=1)
+
         # --- Return configurations as a dictionary ---
         return {
             "n_vals": n_vals,
@@ -95,9 +134,46 @@ class BingoWebApp:
             "x_vals": x_vals,
             "trials": trials,
             "mode": mode_key,
-            "append_data": append_data
+            "estimator": estimator,
+            "strata": strata,
+            "append_data": append_data,
+            "use_service": use_service,
+            "service_port": service_port
         }
 
+    def render_live_estimate(self, n_vals, y_vals, x_vals, mode):
+        """แสดงค่าประมาณทันทีจากตารางสำเร็จรูป ของค่า n, y, x ชุดแรก (อัปเดตทุกครั้งที่แก้ค่าใน Sidebar)"""
+        surface = load_lookup_surface()
+        # ระหว่างแก้ช่วง (เช่น "ถึง" < "เริ่ม") list อาจว่างชั่วคราว ให้ข้ามไปเฉยๆ
+        if surface is None or not (n_vals and y_vals and x_vals):
+            return
+        n, y, x = n_vals[0], y_vals[0], x_vals[0]
+        result = surface.lookup(n, y, x, mode)
+        if result is None:
+            st.sidebar.caption(f"🔎 ค่าประมาณ (n={n}, y={y}, ผู้เล่น={x}): อยู่นอกช่วงตารางสำเร็จรูป")
+        else:
+            st.sidebar.metric(f"🔎 ค่าประมาณรอบที่ชนะ (n={n}, y={y}, ผู้เล่น={x})",
+                              f"{result['mean']:.2f} ± {result['error']:.2f}",
+                              help=f"S.D. ≈ {result['sd']:.2f} (ประมาณค่าจากตารางสำเร็จรูป ไม่ได้จำลองจริง)")
+
+    def compute_cells(self, n, y, x_vals, final_mode, config):
+        """
+        คำนวณทุกค่า x ของคู่ (n, y) เดียวกัน
+        yield (index, result) ทีละช่องทันทีที่เสร็จ (ลำดับอาจไม่ตรงกับ x_vals ถ้าใช้ Service)
+        """
+        if config['use_service']:
+            client = BingoServiceClient(port=config['service_port'])
+            # ถ้าสะสมข้อมูล ต้องขอตัวอย่างสุ่มชุดใหม่ ไม่งั้น Cache จะคืนผลชุดเดิมซ้ำ
+            cells = [make_cell(n, y, x, config['trials'], final_mode, config['estimator'], config['strata'],
+                               fresh=config['append_data'])
+                     for x in x_vals]
+            for result in client.sweep(cells):
+                yield result['index'], result
+        else:
+            for index, x in enumerate(x_vals):
+                yield index, BingoSimulator.run_cell(n, y, x, config['trials'], final_mode,
+                                                     config['estimator'], config['strata'])
+
     def run_simulation(self, config):
         """ฟังก์ชันหลักสำหรับรัน Simulation"""
         
@@ -129,37 +205,36 @@ class BingoWebApp:
                     batch_x = []
                     last_hist_data = []
 
-                    for x in config['x_vals']:
-                        # อัปเดตสถานะหน้าจอ
-                        status_text.text(f"กำลังจำลอง... n={n}, y={y}, ผู้เล่น={x} ({current_iter + 1}/{total_iterations})")
-                        
-                        # --- Core Simulation Loop ---
-                        turns_in_this_group = []
-                        for _ in range(config['trials']):
-                            cards = BingoCardGenerator.generate_cards(n, y, x, final_mode)
-                            turns = BingoGameEngine.play_one_game(cards, y)
-                            turns_in_this_group.append(turns)
-                        # ----------------------------
+                    # --- Core Simulation Loop ---
+                    status_text.text(f"กำลังจำลอง... n={n}, y={y} ({current_iter + 1}/{total_iterations})")
+                    results = {}
+                    for index, result in self.compute_cells(n, y, config['x_vals'], final_mode, config):
+                        results[index] = result
+                        current_iter += 1
+                        progress_bar.progress(current_iter / total_iterations)
+                        status_text.text(f"กำลังจำลอง... n={n}, y={y}, ผู้เล่น={config['x_vals'][index]} ({current_iter}/{total_iterations})")
 
-                        # คำนวณสถิติ
-                        mean_val = np.mean(turns_in_this_group)
-                        sd_val = np.std(turns_in_this_group)
+                    for index, x in enumerate(config['x_vals']):
+                        result = results[index]
+                        turns_in_this_group = result['turns']
+                        mean_val = result['mean']
+                        # ----------------------------
                         
                         # บันทึกลง Session State
                         st.session_state.results_data.append({
-                            "n": n, "y": y, "Players": x, "Trials": config['trials'],
-                            "Mean": round(mean_val, 4), "S.D.": round(sd_val, 4),
-                            "Min": int(np.min(turns_in_this_group)), 
-                            "Max": int(np.max(turns_in_this_group))
+                            "n": n, "y": y, "Players": x, "Trials": result['games'],
+                            "Estimator": config['estimator'],
+                            "Mean": round(mean_val, 4), "S.D.": round(result['sd'], 4),
+                            "S.E.": round(result['se'], 4),
+                            "ESS": round(result['ess'], 1), "VRF": round(result['vrf'], 3),
+                            "Min": result['min'], 
+                            "Max": result['max']
                         })
 
                         # เก็บข้อมูลสำหรับกราฟ
                         batch_means.append(mean_val)
                         batch_x.append(x)
                         last_hist_data = turns_in_this_group
-                        
-                        current_iter += 1
-                        progress_bar.progress(current_iter / total_iterations)
 
                     # จบลูปย่อย x: แสดงกราฟทันที (Real-time update logic)
                     self.display_charts(batch_x, batch_means, last_hist_data, n, y, config['trials'])
@@ -242,7 +317,14 @@ class BingoWebApp:
             2. สามารถเลือกใส่แบบ **ค่าเดียว** หรือ **ช่วง (Range)** เพื่อดูแนวโน้ม
             3. กดปุ่ม **Start Simulation**
             4. ระบบจะคำนวณและแสดงกราฟวิเคราะห์ผลให้ทีละชุดข้อมูล
-            5. เมื่อเสร็จสิ้น สามารถดาวน์โหลดผลเป็นไฟล์ CSV ได้ที่แท็บ 'ตารางข้อมูล'
+            5. ถ้าผู้เล่นน้อย (ราว 1-2 คน) เลือก **Estimator** แบบ Stratified หรือ Antithetic เพื่อให้ช่วงความเชื่อมั่นแคบลงโดยเล่นน้อยเกม
+               คอลัมน์ **ESS** คือขนาดตัวอย่างที่มีผล และ **VRF** = ESS / จำนวนเกมที่เล่นจริง (ค่าประมาณจากข้อมูล มีความคลาดเคลื่อนเอง)
+               ผู้เล่น 1 คน Stratified ได้ VRF ราว 1.3 ส่วนผู้เล่นตั้งแต่ 10 คนขึ้นไป VRF จะอยู่ราว 1 คือไม่ต่างจากแบบมาตรฐาน
+            6. ถ้ามีหลายคนใช้งานพร้อมกัน ให้เปิด `python bingo_service.py` ค้างไว้ แล้วติ๊ก **ใช้ Simulation Service**
+               ช่องที่เคยคำนวณแล้ว หรือกำลังคำนวณอยู่ จะได้ผลทันทีโดยไม่ต้องคำนวณซ้ำ
+            7. ถ้ามีไฟล์ `bingo_surface.npz` (สร้างด้วย `python bingo_surface.py build`) เมนูซ้ายจะแสดง **ค่าประมาณทันที**
+               ของค่า n, y, ผู้เล่น ชุดแรก พร้อมขอบเขตความคลาดเคลื่อน ก่อนกดจำลองจริง
+            8. เมื่อเสร็จสิ้น สามารถดาวน์โหลดผลเป็นไฟล์ CSV ได้ที่แท็บ 'ตารางข้อมูล'
             """)
 
 # ==========================================
@@ -110,17 +110,19 @@ class BingoGameEngine:
     คลาสสำหรับรันเกมและตรวจสอบผลแพ้ชนะ
     """
     @staticmethod
-    def play_one_game(cards, y):
+    def play_one_game(cards, y, draw_sequence=None):
         """
         จำลองการเล่น 1 เกม
         cards: numpy array 3D ของผู้เล่นทุกคน
         y: จำนวนตัวเลขสูงสุด
+        draw_sequence: ลำดับเลขที่จะขาน (ถ้าไม่ระบุจะสุ่มใหม่)
         Return: จำนวนรอบที่ใช้จนกว่าจะมีคนชนะคนแรก (int)
         """
         num_players, n, _ = cards.shape
         
         # 1. สุ่มลำดับตัวเลขที่จะขาน (Permutation)
-        draw_sequence = np.random.permutation(np.arange(1, y + 1))
+        if draw_sequence is None:
+            draw_sequence = np.random.permutation(np.arange(1, y + 1))
         
         # 2. สร้างตารางเช็คผล (Marks) เริ่มต้นเป็น False ทั้งหมด
         # ถ้าการ์ดช่องไหนเป็น 0 (Free Space) ให้ถือว่าถูก Mark แล้ว (True)
@@ -164,4 +166,182 @@ class BingoGameEngine:
             if player_wins.any():
                 return current_turn
                 
-        return y # กรณีสุดวิสัย (ไม่น่าเกิดขึ้น)
\ No newline at end of file
+        return y # กรณีสุดวิสัย (ไม่น่าเกิดขึ้น)
+
+# ==========================================
+# ส่วนที่ 5: ตัวประมาณค่าแบบลดความแปรปรวน (Estimator)
+# ==========================================
+class EstimatorMode:
+    STANDARD = "standard"       # ทุกเกมสุ่มอิสระต่อกัน (แบบเดิม)
+    ANTITHETIC = "antithetic"   # เล่นเป็นคู่: ลำดับขานปกติ + ลำดับกลับด้าน บนการ์ดชุดเดียวกัน
+    STRATIFIED = "stratified"   # แบ่งชั้น (Strata) ตามรอบที่เลขบนการ์ดใบแรกถูกขานครบ r ตัว
+
+
+class BingoSimulator:
+    """
+    คลาสสำหรับรันการจำลอง 1 ช่อง (n, y, ผู้เล่น) หลายรอบแล้วสรุปสถิติ
+    ทุกโหมดให้ค่าเฉลี่ยที่ไม่เอนเอียง (Unbiased) ต่างกันแค่ความแปรปรวนของค่าเฉลี่ย
+    """
+    @staticmethod
+    def run_cell(n, y, num_players, trials, mode, estimator=EstimatorMode.STANDARD, strata=10):
+        """
+        รันการจำลองหนึ่งชุดตามโหมดตัวประมาณค่าที่เลือก
+        Return: dict ที่มี turns, mean, sd, se, min, max, games, ess, vrf
+        - se: ส่วนเบี่ยงเบนมาตรฐานของค่าเฉลี่ย (SD of the mean)
+        - ess: ขนาดตัวอย่างที่มีผลเทียบเท่าการสุ่มอิสระ (Effective Sample Size)
+        - vrf: อัตราการลดความแปรปรวน = ess / จำนวนเกมที่เล่นจริง
+        """
+        # ต้องมีอย่างน้อย 2 หน่วยอิสระ (เกม หรือ คู่เกมสำหรับ Antithetic) จึงจะประมาณ S.E. ได้
+        min_trials = 4 if estimator == EstimatorMode.ANTITHETIC else 2
+        if trials < min_trials:
+            raise ValueError(f"ข้อผิดพลาด: จำนวนรอบทดลอง ({trials}) น้อยเกินไป! โหมด {estimator} ต้องมีอย่างน้อย {min_trials} รอบ")
+
+        if estimator == EstimatorMode.ANTITHETIC:
+            turns, mean_val, var_mean = BingoSimulator._antithetic(n, y, num_players, trials, mode)
+        elif estimator == EstimatorMode.STRATIFIED:
+            turns, mean_val, var_mean = BingoSimulator._stratified(n, y, num_players, trials, mode, strata)
+        else:
+            turns, mean_val, var_mean = BingoSimulator._standard(n, y, num_players, trials, mode)
+
+        turns = np.asarray(turns)
+        games = len(turns)
+        sample_var = np.var(turns, ddof=1) if games > 1 else 0.0
+
+        # ESS = ความแปรปรวนต่อเกม / ความแปรปรวนของค่าเฉลี่ย
+        # ถ้าประมาณค่าไม่ได้ (ตัวอย่างน้อยเกินไป หรือทุกเกมได้ผลเท่ากัน) ให้ถือว่าเท่ากับจำนวนเกม
+        if var_mean > 0 and sample_var > 0:
+            ess = sample_var / var_mean
+        else:
+            ess = float(games)
+
+        return {
+            "turns": turns.tolist(),
+            "mean": float(mean_val),
+            "sd": float(np.std(turns)),
+            "se": float(math.sqrt(var_mean)),
+            "min": int(np.min(turns)),
+            "max": int(np.max(turns)),
+            "games": games,
+            "ess": float(ess),
+            "vrf": float(ess / games),
+        }
+
+    @staticmethod
+    def _standard(n, y, num_players, trials, mode):
+        """แบบเดิม: การ์ดใหม่และลำดับขานใหม่ทุกเกม"""
+        turns = []
+        for _ in range(trials):
+            cards = BingoCardGenerator.generate_cards(n, y, num_players, mode)
+            turns.append(BingoGameEngine.play_one_game(cards, y))
+
+        var_mean = np.var(turns, ddof=1) / trials
+        return turns, np.mean(turns), var_mean
+
+    @staticmethod
+    def _antithetic(n, y, num_players, trials, mode):
+        """
+        Antithetic Pairs: ใช้การ์ดชุดเดียวกันเล่น 2 เกม ด้วยลำดับขานปกติและลำดับกลับด้าน
+        (การกลับด้านเทียบเท่ากับการใช้ค่าเติมเต็ม 1-U ของ Random Key ที่ใช้เรียงลำดับ)
+        แต่ละเกมยังคงเป็นการสุ่มที่ถูกต้อง ค่าเฉลี่ยจึงไม่เอนเอียง
+
+        ข้อจำกัด: เกมมักจบภายใน ~30-40% แรกของลำดับขาน เกมคู่จึงแทบเป็นอิสระจากเกมแรก
+        และการใช้การ์ดชุดเดียวกันยังเพิ่มสหสัมพันธ์เชิงบวกเล็กน้อย
+        ได้ผลบ้าง (VRF ~1.2) เมื่อผู้เล่นน้อยมาก แต่ผู้เล่นหลายคนแทบไม่ต่างจากแบบมาตรฐาน (VRF ~1)
+        """
+        pairs = trials // 2
+        turns = []
+        pair_means = []
+        for _ in range(pairs):
+            cards = BingoCardGenerator.generate_cards(n, y, num_players, mode)
+            draw_sequence = np.random.permutation(np.arange(1, y + 1))
+            t1 = BingoGameEngine.play_one_game(cards, y, draw_sequence)
+            t2 = BingoGameEngine.play_one_game(cards, y, draw_sequence[::-1])
+            turns.extend([t1, t2])
+            pair_means.append((t1 + t2) / 2)
+
+        # หน่วยอิสระคือ "คู่" ไม่ใช่ "เกม"
+        var_mean = np.var(pair_means, ddof=1) / pairs
+        return turns, np.mean(pair_means), var_mean
+
+    @staticmethod
+    def _expected_bingo_rank(n, mode, samples=2000):
+        """
+        ค่าเฉลี่ยของ "จำนวนช่องที่ต้องถูกกากบาท" จนการ์ด 1 ใบเกิดบิงโก
+        ไม่ขึ้นกับ y เพราะขึ้นกับลำดับที่ช่องบนการ์ดถูกกากบาทเท่านั้น (สุ่มลำดับช่องแบบ Vectorized)
+        """
+        free = mode == BingoMode.FREE_SPACE
+        k = n * n - 1 if free else n * n
+        ranks = np.argsort(np.random.random((samples, k)), axis=1).argsort(axis=1) + 1
+        if free:
+            # ช่องฟรีถือว่าถูกกากบาทตั้งแต่เริ่ม (ลำดับที่ 0)
+            ranks = np.insert(ranks, (n * n) // 2, 0, axis=1)
+        grid = ranks.reshape((samples, n, n))
+
+        line_done = np.concatenate([
+            grid.max(axis=2),
+            grid.max(axis=1),
+            np.diagonal(grid, axis1=1, axis2=2).max(axis=1, keepdims=True),
+            np.diagonal(np.flip(grid, axis=2), axis1=1, axis2=2).max(axis=1, keepdims=True),
+        ], axis=1)
+        return float(line_done.min(axis=1).mean())
+
+    @staticmethod
+    def _stratified(n, y, num_players, trials, mode, strata):
+        """
+        Stratified Sampling: แบ่งชั้นตาม "ตำแหน่งในลำดับขานที่เลขบนการ์ดใบแรกถูกขานครบ r ตัว"
+        ซึ่งขึ้นกับตำแหน่งของเลขทุกตัวบนการ์ดใบแรกร่วมกัน (Order Statistic ลำดับที่ r)
+        r = จำนวนช่องเฉลี่ยที่ต้องกากบาทจนบิงโก ตำแหน่งนี้จึงใกล้กับรอบที่การ์ดใบแรกชนะ
+
+        ตำแหน่งนี้มีการแจกแจงแบบ Negative Hypergeometric ที่คำนวณได้แน่นอน
+        จึงสุ่มตำแหน่งจากช่วงความน่าจะเป็นเท่ากันของแต่ละชั้นได้ แล้ววางเลขที่เหลือแบบสุ่มตามเงื่อนไข
+        ค่าเฉลี่ยรวมคือค่าเฉลี่ยของแต่ละชั้นถ่วงน้ำหนักเท่ากัน (ไม่เอนเอียง)
+
+        ข้อจำกัด: ได้ผลชัดเมื่อผู้เล่นน้อย (ผู้เล่น 1 คน VRF ~1.3) เมื่อผู้เล่นมาก
+        ผู้ชนะมักไม่ใช่การ์ดใบแรก ผลจึงใกล้แบบมาตรฐาน (VRF ~1) แต่ไม่แย่กว่า
+        """
+        # ต้องมีอย่างน้อย 2 เกมต่อชั้น เพื่อประมาณความแปรปรวนภายในชั้นได้
+        num_strata = max(1, min(strata, trials // 2))
+        numbers = np.arange(1, y + 1)
+        stratum_turns = [[] for _ in range(num_strata)]
+        turns = []
+
+        k = n * n - 1 if mode == BingoMode.FREE_SPACE else n * n
+        r = min(max(1, round(BingoSimulator._expected_bingo_rank(n, mode))), k)
+
+        # CDF ของตำแหน่ง (0..y-1) ที่เลขบนการ์ดตัวที่ r ถูกขาน
+        total = math.comb(y, k)
+        pmf = [math.comb(m, r - 1) * math.comb(y - m - 1, k - r) / total for m in range(y)]
+        cdf = np.cumsum(pmf)
+        last_position = y - (k - r) - 1
+
+        for i in range(trials):
+            h = i % num_strata
+            cards = BingoCardGenerator.generate_cards(n, y, num_players, mode)
+            pivots = np.random.permutation(cards[0][cards[0] != 0])
+
+            # สุ่มตำแหน่ง m ภายในชั้น h (u อยู่ในช่วง (h/H, (h+1)/H])
+            u = (h + 1 - np.random.random()) / num_strata
+            m = min(int(np.searchsorted(cdf, u)), last_position)
+
+            # เลขบนการ์ด r-1 ตัวอยู่ก่อน m, 1 ตัวอยู่ที่ m, ที่เหลืออยู่หลัง m (ตำแหน่งสุ่มตามเงื่อนไข)
+            before = np.random.choice(m, r - 1, replace=False)
+            after = m + 1 + np.random.choice(y - m - 1, k - r, replace=False)
+            positions = np.concatenate([before, [m], after]).astype(int)
+
+            draw_sequence = np.empty(y, dtype=int)
+            draw_sequence[positions] = pivots
+            others = np.ones(y, dtype=bool)
+            others[positions] = False
+            draw_sequence[others] = np.random.permutation(numbers[~np.isin(numbers, pivots)])
+
+            t = BingoGameEngine.play_one_game(cards, y, draw_sequence)
+            stratum_turns[h].append(t)
+            turns.append(t)
+
+        mean_val = np.mean([np.mean(s) for s in stratum_turns])
+        var_mean = 0.0
+        for s in stratum_turns:
+            if len(s) > 1:
+                var_mean += np.var(s, ddof=1) / len(s)
+        var_mean /= num_strata ** 2
+        return turns, mean_val, var_mean
@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from bingo_core import BingoValidator, BingoMode, BingoSimulator, EstimatorMode
+
+# ==========================================
+# ส่วนที่ 1: ค่าคงที่ของ Service
+# ==========================================
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+# ==========================================
+# ส่วนที่ 2: งานที่รันใน Worker Process
+# ==========================================
+def _init_worker():
+    """
+    เตรียม Worker ล่วงหน้า (Pre-warm)
+    - import โมดูลหนักๆ ให้เสร็จตั้งแต่ตอนเปิด Pool
+    - สุ่ม Seed ใหม่ทุก Process ไม่งั้น Process ที่ fork มาจะได้ลำดับสุ่มซ้ำกัน
+    """
+    np.random.seed()
+
+
+def _warm_up():
+    """งานเปล่าสำหรับบังคับให้ Pool สร้าง Worker ครบทุกตัวตั้งแต่ตอนเริ่ม"""
+    return os.getpid()
+
+
+def _compute_cell(cell):
+    """คำนวณ 1 ช่อง (ทำงานใน Worker Process)"""
+    final_mode, warnings = BingoValidator.validate(cell["n"], cell["y"], cell["players"], cell["mode"])
+    result = BingoSimulator.run_cell(cell["n"], cell["y"], cell["players"], cell["trials"], final_mode,
+                                     cell["estimator"], cell["strata"])
+    result["warnings"] = warnings
+    return result
+
+
+def make_cell(n, y, players, trials, mode=BingoMode.PURE_MATH, estimator=EstimatorMode.STANDARD, strata=10,
+              fresh=False):
+    """
+    สร้าง dict คำขอ 1 ช่องในรูปแบบที่ Server ใช้
+    fresh=True: ไม่ใช้ผลจาก Cache / งานที่กำลังรัน ให้สุ่มตัวอย่างชุดใหม่เสมอ
+    (ใช้ตอนสะสมข้อมูล ไม่งั้นจะได้ตัวอย่างสุ่มชุดเดิมซ้ำ)
+    """
+    return {
+        "n": int(n), "y": int(y), "players": int(players), "trials": int(trials),
+        "mode": mode, "estimator": estimator, "strata": int(strata), "fresh": bool(fresh),
+    }
+
+
+def _cell_key(cell):
+    """กุญแจสำหรับ Cache และการรวมคำขอซ้ำ (Coalescing) รับ cell ที่ผ่าน make_cell แล้ว (ไม่รวม fresh)"""
+    return (cell["n"], cell["y"], cell["players"], cell["trials"],
+            cell["mode"], cell["estimator"], cell["strata"])
+
+
+# ==========================================
+# ส่วนที่ 3: Server (asyncio HTTP/JSON)
+# ==========================================
+class BingoSimulationServer:
+    """
+    Service จำลองบิงโกสำหรับใช้ร่วมกันในเครื่องเดียว (localhost เท่านั้น)
+    - Worker Pool ที่เปิดรอไว้ล่วงหน้า
+    - คำขอช่องเดียวกันที่กำลังคำนวณอยู่ จะรอผลก้อนเดียวกัน (ไม่คำนวณซ้ำ)
+    - ผลที่เสร็จแล้วเก็บใน Cache (LRU)
+    - ถ้า Worker ตาย (BrokenProcessPool) จะเปิด Pool ใหม่แล้วลองคำนวณช่องนั้นซ้ำ 1 ครั้ง
+    - /sweep ส่งผลกลับทีละบรรทัด (NDJSON) ทันทีที่แต่ละช่องเสร็จ
+
+    Endpoints:
+        GET  /health  -> สถานะ Service
+        POST /cell    -> body: cell dict, ตอบกลับ: result dict
+        POST /sweep   -> body: {"cells": [...]}, ตอบกลับ: NDJSON ทีละช่อง (มี "index")
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, cache_size=1024):
+        if host not in LOCAL_HOSTS:
+            raise ValueError(f"ข้อผิดพลาด: Service รองรับเฉพาะ localhost เท่านั้น (ได้รับ host={host})")
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self._server = None
+        self._connections = set()
+        self._cache = OrderedDict()
+        # key -> (future, pool ที่รันงานนั้น) เพื่อล้างงานของ Pool ที่ตายแล้วได้
+        self._inflight = {}
+        self.stats = {"requests": 0, "computed": 0, "cache_hits": 0, "coalesced": 0, "pool_restarts": 0}
+
+    async def _start_pool(self):
+        """เปิด Worker Pool ใหม่และอุ่นเครื่องทุกตัว"""
+        loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        await asyncio.gather(*[loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)])
+
+    async def _restart_pool(self, broken_pool):
+        """แทนที่ Pool ที่ตายแล้ว (ถ้าคำขออื่นยังไม่ได้เปลี่ยนให้ก่อน)"""
+        async with self._pool_lock:
+            if self._pool is not broken_pool:
+                return
+            broken_pool.shutdown(wait=False, cancel_futures=True)
+            self._inflight = {key: entry for key, entry in self._inflight.items() if entry[1] is not broken_pool}
+            await self._start_pool()
+            self.stats["pool_restarts"] += 1
+
+    async def start(self):
+        """เปิด Worker Pool (อุ่นเครื่องทุกตัว) แล้วเริ่มรับคำขอ"""
+        await self._start_pool()
+
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # ถ้าขอ port=0 ระบบจะเลือก port ว่างให้ เก็บค่าจริงไว้ให้ Client ใช้
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """ปิด Server และ Worker Pool"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # ปิด Connection ที่ยังค้างอยู่ให้จบภายใน stop() (Server.wait_closed ไม่รอ Handler ให้)
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._pool is not None:
+            # wait=False: ไม่บล็อก Event Loop ระหว่างรองานที่ค้างอยู่ใน Worker
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"BWN Bingo Simulation Service: http://{self.host}:{self.port} ({self.workers} workers)")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # --- การคำนวณพร้อม Cache และ Coalescing ---
+    async def compute(self, cell, retry=True):
+        """
+        คืนผลของ 1 ช่อง จาก Cache / งานที่กำลังรันอยู่ / หรือสั่ง Worker คำนวณใหม่
+        ถ้า Pool ตายระหว่างคำนวณ จะเปิด Pool ใหม่แล้วลองซ้ำอีก 1 ครั้ง (retry=False คือไม่ลองซ้ำ)
+        """
+        cell = make_cell(**cell)
+        key = _cell_key(cell)
+        self.stats["requests"] += 1
+
+        if not cell["fresh"] and key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return dict(self._cache[key], cached=True)
+
+        entry = None if cell["fresh"] else self._inflight.get(key)
+        try:
+            if entry is not None:
+                future, pool = entry
+                self.stats["coalesced"] += 1
+            else:
+                pool = self._pool
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(pool, _compute_cell, cell)
+                if not cell["fresh"]:
+                    self._inflight[key] = (future, pool)
+                future.add_done_callback(lambda f: self._on_done(key, f))
+                self.stats["computed"] += 1
+
+            # shield: ถ้า Client รายหนึ่งหลุดไป งานที่คนอื่นรออยู่จะไม่ถูกยกเลิก
+            result = await asyncio.shield(future)
+        except BrokenProcessPool:
+            if not retry:
+                raise
+            await self._restart_pool(pool)
+            return await self.compute(cell, retry=False)
+        return dict(result, cached=False)
+
+    def _on_done(self, key, future):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is future:
+            del self._inflight[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._cache[key] = future.result()
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _compute_or_error(self, cell):
+        """
+        แปลง Error เป็น dict เพื่อส่งกลับให้ Client
+        error_type = "ValueError" คือ Input ไม่ถูกต้อง ส่วนแบบอื่นคือ Service มีปัญหา (เช่น Worker ตาย)
+        """
+        try:
+            if not isinstance(cell, dict):
+                raise TypeError(f"cell ต้องเป็น JSON object (ได้รับ {type(cell).__name__})")
+            return await self.compute(cell)
+        except (ValueError, KeyError, TypeError) as e:
+            return {"error": str(e), "error_type": "ValueError"}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "error_type": type(e).__name__}
+
+    # --- ส่วนจัดการ HTTP ---
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            body = json.loads(await reader.readexactly(length)) if length else {}
+            if not isinstance(body, dict):
+                raise ValueError(f"body ต้องเป็น JSON object (ได้รับ {type(body).__name__})")
+
+            if method == "GET" and path == "/health":
+                payload = dict(self.stats, status="ok", workers=self.workers,
+                               cache_size=len(self._cache), inflight=len(self._inflight))
+                await self._send_json(writer, 200, payload)
+            elif method == "POST" and path == "/cell":
+                result = await self._compute_or_error(body)
+                await self._send_json(writer, self._status_of(result), result)
+            elif method == "POST" and path == "/sweep":
+                cells = body.get("cells", [])
+                if not isinstance(cells, list):
+                    raise ValueError("cells ต้องเป็น JSON array")
+                await self._stream_sweep(writer, cells)
+            else:
+                await self._send_json(writer, 404, {"error": f"ไม่พบ {method} {path}"})
+        except (ValueError, json.JSONDecodeError) as e:
+            await self._send_json(writer, 400, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            finally:
+                self._connections.discard(task)
+
+    @staticmethod
+    def _status_of(result):
+        if "error" not in result:
+            return 200
+        return 400 if result["error_type"] == "ValueError" else 500
+
+    async def _stream_sweep(self, writer, cells):
+        """
+        ส่งผลทีละช่องตามลำดับที่คำนวณเสร็จ (ไม่ใช่ลำดับที่ขอ) แต่ละบรรทัดมี index กำกับ
+        ช่องที่ผิดพลาดก็ส่งเป็นบรรทัด {"error": ..., "index": i} เพราะส่ง Status 200 ไปแล้ว
+        """
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+
+        async def run(index, cell):
+            return index, await self._compute_or_error(cell)
+
+        for next_done in asyncio.as_completed([run(i, c) for i, c in enumerate(cells)]):
+            index, result = await next_done
+            writer.write(json.dumps(dict(result, index=index)).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    @staticmethod
+    async def _send_json(writer, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+
+# ==========================================
+# ส่วนที่ 4: Client แบบบาง (สำหรับ app.py / Notebook)
+# ==========================================
+class BingoServiceClient:
+    """
+    Client สำหรับเรียก BingoSimulationServer
+    Error จากการตรวจสอบค่า Input จะถูกส่งกลับเป็น ValueError เหมือนเรียก bingo_core ตรงๆ
+    Error ฝั่ง Service (เช่น Worker ตาย) เป็น RuntimeError
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+        if host not in LOCAL_HOSTS:
+            raise ValueError(f"ข้อผิดพลาด: Service รองรับเฉพาะ localhost เท่านั้น (ได้รับ host={host})")
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        return conn, conn.getresponse()
+
+    def health(self):
+        conn, resp = self._request("GET", "/health")
+        try:
+            return json.loads(resp.read())
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _raise_if_error(result):
+        if "error" not in result:
+            return
+        if result.get("error_type") == "ValueError":
+            raise ValueError(result["error"])
+        raise RuntimeError(result["error"])
+
+    def run_cell(self, n, y, players, trials, mode=BingoMode.PURE_MATH,
+                 estimator=EstimatorMode.STANDARD, strata=10, fresh=False):
+        """คำนวณ 1 ช่อง ผลลัพธ์มีรูปแบบเดียวกับ BingoSimulator.run_cell (เพิ่ม warnings และ cached)"""
+        conn, resp = self._request("POST", "/cell",
+                                   make_cell(n, y, players, trials, mode, estimator, strata, fresh))
+        try:
+            result = json.loads(resp.read())
+        finally:
+            conn.close()
+        self._raise_if_error(result)
+        return result
+
+    def sweep(self, cells):
+        """
+        ส่งหลายช่องพร้อมกัน แล้ว yield ผลทีละช่องทันทีที่ Server คำนวณเสร็จ
+        cells: list ของ dict จาก make_cell(...)
+        ผลแต่ละตัวมี key "index" บอกตำแหน่งใน cells
+        """
+        cells = list(cells)
+        conn, resp = self._request("POST", "/sweep", {"cells": cells})
+        try:
+            if resp.status != 200:
+                self._raise_if_error(json.loads(resp.read()))
+            received = 0
+            for line in resp:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                self._raise_if_error(result)
+                received += 1
+                yield result
+            if received < len(cells):
+                raise ConnectionError(f"Service ส่งผลกลับมาไม่ครบ ({received}/{len(cells)} ช่อง)")
+        finally:
+            conn.close()
+
+
+# ==========================================
+# Entry Point
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BWN Bingo Simulation Service (localhost)")
+    parser.add_argument("--host", default=DEFAULT_HOST, choices=LOCAL_HOSTS)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    server = BingoSimulationServer(args.host, args.port, args.workers, args.cache_size)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
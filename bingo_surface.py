@@ -0,0 +1,305 @@
+import argparse
+import math
+import os
+
+import numpy as np
+
+from bingo_core import BingoValidator, BingoMode, BingoSimulator, EstimatorMode
+
+# ==========================================
+# ส่วนที่ 1: ค่าเริ่มต้นของตารางอ้างอิง (Reference Grid)
+# ==========================================
+DEFAULT_SURFACE_PATH = "bingo_surface.npz"
+DEFAULT_N_VALS = list(range(3, 10))
+DEFAULT_Y_VALS = list(range(25, 201, 25))
+DEFAULT_MODES = [BingoMode.PURE_MATH, BingoMode.FREE_SPACE]
+
+
+def log_players_grid(max_players=100_000, points=16):
+    """สร้างแกนจำนวนผู้เล่นแบบ log scale ตั้งแต่ 1 ถึง max_players (ตัดค่าซ้ำหลังปัดเศษ)"""
+    return [int(v) for v in np.unique(np.round(np.logspace(0, math.log10(max_players), points)))]
+
+
+# ==========================================
+# ส่วนที่ 2: ตารางค่าสรุปสำเร็จรูป (Lookup Surface)
+# ==========================================
+class BingoLookupSurface:
+    """
+    ตารางค่าเฉลี่ย / S.D. / S.E. ของจำนวนรอบที่ชนะ ที่คำนวณไว้ล่วงหน้าบน Grid (mode, n, y, x)
+    ตอบคำถามจุดใดๆ ในช่วง Grid ได้ทันทีด้วยการประมาณค่าในช่วง (Interpolation)
+    - แกน y: เชิงเส้น
+    - แกน x: เชิงเส้นบน log(x)
+    - แกน n: ต้องตรงกับค่าใน Grid (ขนาดตารางเป็นจำนวนเต็ม ไม่ประมาณค่าข้าม n)
+    ช่องที่เล่นไม่ได้ (y น้อยเกินไป ฯลฯ) เก็บเป็น NaN
+    done[mode, n, y] บอกว่าแถว x ของ (mode, n, y) นั้นคำนวณเสร็จแล้ว (ใช้ต่องาน build ที่หยุดกลางคัน)
+    """
+    def __init__(self, n_vals, y_vals, x_vals, modes, mean, sd, se, trials, done=None,
+                 estimator=EstimatorMode.STANDARD):
+        self.n_vals = np.asarray(n_vals, dtype=int)
+        self.y_vals = np.asarray(y_vals, dtype=int)
+        self.x_vals = np.asarray(x_vals, dtype=int)
+        self.modes = [str(m) for m in modes]
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.sd = np.asarray(sd, dtype=np.float32)
+        self.se = np.asarray(se, dtype=np.float32)
+        self.trials = int(trials)
+        if done is None:
+            done = np.ones(self.mean.shape[:3], dtype=bool)
+        self.done = np.asarray(done, dtype=bool)
+        self.estimator = str(estimator)
+
+    # --- การสร้างตาราง ---
+    @classmethod
+    def build(cls, n_vals=DEFAULT_N_VALS, y_vals=DEFAULT_Y_VALS, x_vals=None, modes=DEFAULT_MODES,
+              trials=200, estimator=EstimatorMode.STANDARD, client=None, progress=None,
+              checkpoint=None, resume=False):
+        """
+        จำลองทุกช่องใน Grid แล้วคืน BingoLookupSurface
+        client: BingoServiceClient (ถ้าระบุ จะส่งทุกช่องที่ยังไม่เสร็จไปให้ Service คำนวณพร้อมกันในคราวเดียว)
+        progress: ฟังก์ชัน callback(done, total) สำหรับแสดงความคืบหน้า
+        checkpoint: path ของไฟล์ .npz ที่จะบันทึกผลทุกครั้งที่คำนวณเสร็จ 1 แถว (mode, n, y)
+        resume: ถ้า True และมีไฟล์ checkpoint อยู่แล้ว จะข้ามแถวที่คำนวณเสร็จไปแล้ว
+
+        เวลาที่ใช้: ต้นทุนต่อเกมโตตามจำนวนผู้เล่นและขนาดการ์ด
+        (x=100,000, n=9, y=200 ใช้ราว 7.5 วินาที/เกม แถวนี้แถวเดียวที่ 200 รอบใช้ราว 45 นาที)
+        Grid ค่าเริ่มต้นทั้งหมดจึงใช้ราว 30-50 ชั่วโมง CPU
+        ควรส่งงานผ่าน Service ที่มีหลาย Worker (client) ซึ่งเวลาจริงจะลดลงตามจำนวน Worker
+        และระบุ checkpoint เสมอ เพื่อให้รันต่อได้ถ้าถูกขัดจังหวะ
+        """
+        x_vals = log_players_grid() if x_vals is None else sorted(x_vals)
+        n_vals, y_vals = sorted(n_vals), sorted(y_vals)
+        shape = (len(modes), len(n_vals), len(y_vals), len(x_vals))
+
+        if resume and checkpoint is not None and os.path.exists(checkpoint):
+            surface = cls.load(checkpoint)
+            same_grid = (surface.n_vals.tolist() == n_vals and surface.y_vals.tolist() == y_vals
+                         and surface.x_vals.tolist() == x_vals and surface.modes == list(modes)
+                         and surface.trials == trials and surface.estimator == estimator)
+            if not same_grid:
+                raise ValueError(f"ข้อผิดพลาด: Grid ในไฟล์ {checkpoint} ไม่ตรงกับที่ขอ ไม่สามารถรันต่อได้")
+        else:
+            nan_table = np.full(shape, np.nan, dtype=np.float32)
+            surface = cls(n_vals, y_vals, x_vals, modes, nan_table, nan_table.copy(), nan_table.copy(),
+                          trials, np.zeros(shape[:3], dtype=bool), estimator)
+
+        rows = [row for row in np.ndindex(*shape[:3]) if not surface.done[row]]
+        finished = surface.done.sum()
+
+        def store(row, xi, result):
+            surface.mean[row + (xi,)] = result["mean"]
+            surface.sd[row + (xi,)] = result["sd"]
+            surface.se[row + (xi,)] = result["se"]
+
+        def finish_row(row):
+            nonlocal finished
+            surface.done[row] = True
+            if checkpoint is not None:
+                surface.save(checkpoint)
+            finished += 1
+            if progress is not None:
+                progress(int(finished) * len(x_vals), surface.mean.size)
+
+        def valid_cells(row):
+            mi, ni, yi = row
+            return cls._valid_cells(n_vals[ni], y_vals[yi], x_vals, modes[mi])
+
+        if client is not None:
+            # import ตรงนี้เพื่อไม่ให้การโหลดตารางเฉยๆ ต้องพึ่งโมดูล Service
+            from bingo_service import make_cell
+            cells, owners, remaining = [], [], {}
+            for row in rows:
+                valid = valid_cells(row)
+                remaining[row] = len(valid)
+                for xi, x, final_mode in valid:
+                    cells.append(make_cell(n_vals[row[1]], y_vals[row[2]], x, trials, final_mode, estimator))
+                    owners.append((row, xi))
+            for row in rows:
+                if remaining[row] == 0:
+                    finish_row(row)
+            for result in client.sweep(cells):
+                row, xi = owners[result["index"]]
+                store(row, xi, result)
+                remaining[row] -= 1
+                if remaining[row] == 0:
+                    finish_row(row)
+        else:
+            for row in rows:
+                for xi, x, final_mode in valid_cells(row):
+                    store(row, xi, BingoSimulator.run_cell(n_vals[row[1]], y_vals[row[2]], x, trials,
+                                                           final_mode, estimator))
+                finish_row(row)
+
+        return surface
+
+    @staticmethod
+    def _valid_cells(n, y, x_vals, mode):
+        """คืน list ของ (index, x, final_mode) เฉพาะช่องที่เล่นได้ ช่องที่เล่นไม่ได้จะคงเป็น NaN"""
+        valid = []
+        for xi, x in enumerate(x_vals):
+            try:
+                final_mode, _ = BingoValidator.validate(n, y, x, mode)
+                valid.append((xi, x, final_mode))
+            except ValueError:
+                pass
+        return valid
+
+    # --- การบันทึก / โหลด (ไฟล์ Binary .npz) ---
+    def save(self, path=DEFAULT_SURFACE_PATH):
+        """บันทึกลงไฟล์ชั่วคราวก่อนแล้วค่อยแทนที่ ไฟล์เดิมจะไม่เสียถ้าถูกขัดจังหวะระหว่างบันทึก"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f, n_vals=self.n_vals, y_vals=self.y_vals, x_vals=self.x_vals,
+                modes=np.array(self.modes), mean=self.mean, sd=self.sd, se=self.se,
+                trials=np.array(self.trials), done=self.done, estimator=np.array(self.estimator),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_SURFACE_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["n_vals"], data["y_vals"], data["x_vals"], data["modes"].tolist(),
+                       data["mean"], data["sd"], data["se"], data["trials"],
+                       data["done"] if "done" in data else None,
+                       str(data["estimator"]) if "estimator" in data else EstimatorMode.STANDARD)
+
+    # --- การตอบคำถาม ---
+    @staticmethod
+    def _bracket(axis, value):
+        """หาตำแหน่งคู่ข้างเคียงบนแกน Return: (i0, i1, weight ของ i1) หรือ None ถ้าอยู่นอกช่วง"""
+        if value < axis[0] or value > axis[-1]:
+            return None
+        i1 = int(np.searchsorted(axis, value))
+        if axis[i1] == value:
+            return i1, i1, 0.0
+        i0 = i1 - 1
+        return i0, i1, float((value - axis[i0]) / (axis[i1] - axis[i0]))
+
+    @staticmethod
+    def _interpolation_error(values, coords, i0, i1, value):
+        """
+        ประมาณความคลาดเคลื่อนของการประมาณค่าเชิงเส้นบนแกนเดียว จากความโค้งของข้อมูล
+        |f - เส้นตรง| = |f''| / 2 * (v - c0)(c1 - v) โดยใช้ Second Divided Difference
+        ของจุดข้างเคียงถัดไป (ซ้ายหรือขวา) แทน f''/2 แล้วเลือกค่าที่มากกว่า
+        ถ้าไม่มีจุดข้างเคียงถัดไปให้ใช้ (แกนมีแค่ 2 จุด หรือจุดถัดไปเล่นไม่ได้)
+        จะคืนระยะระหว่างสองจุด |f(c1) - f(c0)| แทน เพราะไม่มีข้อมูลความโค้ง
+        """
+        if i0 == i1:
+            return 0.0
+        curvatures = []
+        for a, b, c in ((i0 - 1, i0, i1), (i0, i1, i1 + 1)):
+            if a < 0 or c >= len(coords):
+                continue
+            fa, fb, fc = float(values[a]), float(values[b]), float(values[c])
+            if np.isnan([fa, fb, fc]).any():
+                continue
+            slope_ab = (fb - fa) / (coords[b] - coords[a])
+            slope_bc = (fc - fb) / (coords[c] - coords[b])
+            curvatures.append(abs((slope_bc - slope_ab) / (coords[c] - coords[a])))
+        if not curvatures:
+            return abs(float(values[i1]) - float(values[i0]))
+        return float(max(curvatures) * (value - coords[i0]) * (coords[i1] - value))
+
+    def lookup(self, n, y, x, mode):
+        """
+        ประมาณค่าจากตารางอย่างเดียว (ไม่จำลองเพิ่ม)
+        Return: dict {mean, sd, error} หรือ None ถ้าจุดนี้อยู่นอก Grid / ข้างเคียงเล่นไม่ได้
+        error: ขอบเขตความคลาดเคลื่อน = ความคลาดเคลื่อนจากความโค้งตามแกน y + ตามแกน log(x) + 2 S.E.
+        """
+        if mode not in self.modes or n not in self.n_vals:
+            return None
+        y_br = self._bracket(self.y_vals, y)
+        x_br = self._bracket(np.log(self.x_vals), math.log(x)) if x >= 1 else None
+        if y_br is None or x_br is None:
+            return None
+
+        mi = self.modes.index(mode)
+        ni = int(np.searchsorted(self.n_vals, n))
+        (y0, y1, wy), (x0, x1, wx) = y_br, x_br
+        weights = np.array([[(1 - wy) * (1 - wx), (1 - wy) * wx],
+                            [wy * (1 - wx), wy * wx]])
+
+        def corners(table):
+            return table[mi, ni][np.ix_([y0, y1], [x0, x1])].astype(float)
+
+        mean_c, sd_c, se_c = corners(self.mean), corners(self.sd), corners(self.se)
+        used = weights > 0
+        if np.isnan(mean_c[used]).any():
+            return None
+
+        mean_val = float(np.sum(weights[used] * mean_c[used]))
+        sd_val = float(np.sum(weights[used] * sd_c[used]))
+        se_val = float(np.sum(weights[used] * se_c[used]))
+        table = self.mean[mi, ni]
+        log_x = np.log(self.x_vals)
+        error_y = max(self._interpolation_error(table[:, xi], self.y_vals, y0, y1, y) for xi in {x0, x1})
+        error_x = max(self._interpolation_error(table[yi], log_x, x0, x1, math.log(x)) for yi in {y0, y1})
+        error = error_y + error_x + 2 * se_val
+        return {"mean": mean_val, "sd": sd_val, "error": error}
+
+    def estimate(self, n, y, x, mode, tolerance, trials=None, estimator=EstimatorMode.STANDARD):
+        """
+        ตอบค่าเฉลี่ยของ (n, y, x, mode)
+        ถ้าขอบเขตความคลาดเคลื่อนจากตาราง <= tolerance ใช้ค่าจากตารางทันที
+        ไม่เช่นนั้นจำลองจริง (ใช้จำนวนรอบเท่ากับตอนสร้างตาราง ถ้าไม่ระบุ trials)
+        Return: dict {mean, sd, error, source} โดย source เป็น "surface" หรือ "simulation"
+        """
+        result = self.lookup(n, y, x, mode)
+        if result is not None and result["error"] <= tolerance:
+            return dict(result, source="surface")
+
+        final_mode, _ = BingoValidator.validate(n, y, x, mode)
+        sim = BingoSimulator.run_cell(n, y, x, trials or self.trials, final_mode, estimator)
+        return {"mean": sim["mean"], "sd": sim["sd"], "error": 2 * sim["se"], "source": "simulation"}
+
+
+# ==========================================
+# Entry Point
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BWN Bingo Lookup Surface")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser(
+        "build", help="จำลองทุกช่องใน Grid แล้วบันทึกเป็นไฟล์ .npz",
+        description="Grid ค่าเริ่มต้นใช้ราว 30-50 ชั่วโมง CPU (x=100,000 ใช้ราว 7.5 วินาที/เกม) "
+                    "แนะนำให้เปิด `python bingo_service.py --workers <จำนวนคอร์>` แล้วใช้ --service-port",
+    )
+    p_build.add_argument("--out", default=DEFAULT_SURFACE_PATH)
+    p_build.add_argument("--n", type=int, nargs="+", default=DEFAULT_N_VALS)
+    p_build.add_argument("--y", type=int, nargs="+", default=DEFAULT_Y_VALS)
+    p_build.add_argument("--x-max", type=int, default=100_000)
+    p_build.add_argument("--x-points", type=int, default=16)
+    p_build.add_argument("--trials", type=int, default=200)
+    p_build.add_argument("--estimator", default=EstimatorMode.STANDARD,
+                         choices=[EstimatorMode.STANDARD, EstimatorMode.ANTITHETIC, EstimatorMode.STRATIFIED])
+    p_build.add_argument("--service-port", type=int, default=None,
+                         help="ส่งทุกช่องไปที่ bingo_service.py บน port นี้พร้อมกัน (เวลาจริงลดลงตามจำนวน Worker)")
+    p_build.add_argument("--resume", action="store_true",
+                         help="รันต่อจากไฟล์ --out ที่บันทึกไว้ (Grid ต้องตรงกันรวมถึง --trials และ --estimator)")
+
+    p_query = sub.add_parser("query", help="ประมาณค่าจากไฟล์ตาราง")
+    p_query.add_argument("n", type=int)
+    p_query.add_argument("y", type=int)
+    p_query.add_argument("x", type=int)
+    p_query.add_argument("--mode", default=BingoMode.PURE_MATH, choices=DEFAULT_MODES)
+    p_query.add_argument("--tolerance", type=float, default=1.0)
+    p_query.add_argument("--surface", default=DEFAULT_SURFACE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        client = None
+        if args.service_port is not None:
+            from bingo_service import BingoServiceClient
+            client = BingoServiceClient(port=args.service_port)
+        surface = BingoLookupSurface.build(
+            args.n, args.y, log_players_grid(args.x_max, args.x_points), trials=args.trials,
+            estimator=args.estimator, client=client,
+            progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+            checkpoint=args.out, resume=args.resume,
+        )
+        print(f"\nบันทึกแล้ว: {args.out}")
+    else:
+        surface = BingoLookupSurface.load(args.surface)
+        result = surface.estimate(args.n, args.y, args.x, args.mode, args.tolerance)
+        print(f"Mean = {result['mean']:.4f} ± {result['error']:.4f}  S.D. = {result['sd']:.4f}  ({result['source']})")
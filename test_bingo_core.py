@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from bingo_core import BingoGameEngine, BingoMode, BingoSimulator, EstimatorMode
+
+
+def test_play_one_game_uses_given_draw_sequence():
+    cards = np.arange(1, 10).reshape((1, 3, 3))
+    assert BingoGameEngine.play_one_game(cards, 9, np.arange(1, 10)) == 3
+    assert BingoGameEngine.play_one_game(cards, 9, np.array([1, 5, 2, 9, 3, 4, 6, 7, 8])) == 4
+
+
+@pytest.mark.parametrize("mode", [BingoMode.PURE_MATH, BingoMode.FREE_SPACE])
+@pytest.mark.parametrize("estimator", [EstimatorMode.ANTITHETIC, EstimatorMode.STRATIFIED])
+def test_estimator_mean_matches_standard(mode, estimator):
+    np.random.seed(1)
+    standard = BingoSimulator.run_cell(3, 20, 3, 600, mode)
+    reduced = BingoSimulator.run_cell(3, 20, 3, 600, mode, estimator)
+
+    combined_se = np.hypot(standard["se"], reduced["se"])
+    assert abs(reduced["mean"] - standard["mean"]) < 4 * combined_se
+
+
+def test_run_cell_reports_games_and_ess():
+    np.random.seed(2)
+    standard = BingoSimulator.run_cell(3, 20, 2, 51, BingoMode.PURE_MATH)
+    assert standard["games"] == 51
+    assert standard["ess"] == pytest.approx(51)
+    assert standard["vrf"] == pytest.approx(1.0)
+
+    antithetic = BingoSimulator.run_cell(3, 20, 2, 51, BingoMode.PURE_MATH, EstimatorMode.ANTITHETIC)
+    assert antithetic["games"] == 50
+    assert len(antithetic["turns"]) == 50
+
+
+@pytest.mark.parametrize("mode", [BingoMode.PURE_MATH, BingoMode.FREE_SPACE])
+def test_stratified_reduces_variance_for_single_player(mode):
+    np.random.seed(3)
+    result = BingoSimulator.run_cell(5, 75, 1, 400, mode, EstimatorMode.STRATIFIED, strata=20)
+    assert result["vrf"] > 1.1
+
+
+def test_stratified_handles_y_equal_to_card_size():
+    np.random.seed(4)
+    result = BingoSimulator.run_cell(3, 8, 1, 6, BingoMode.FREE_SPACE, EstimatorMode.STRATIFIED)
+    assert result["games"] == 6
+    assert 3 <= result["min"] <= result["max"] <= 8
+
+
+@pytest.mark.parametrize("estimator, trials", [
+    (EstimatorMode.STANDARD, 0),
+    (EstimatorMode.STANDARD, 1),
+    (EstimatorMode.STRATIFIED, 1),
+    (EstimatorMode.ANTITHETIC, 3),
+])
+def test_run_cell_rejects_too_few_trials(estimator, trials):
+    with pytest.raises(ValueError):
+        BingoSimulator.run_cell(3, 20, 2, trials, BingoMode.PURE_MATH, estimator)
+
+
+@pytest.mark.parametrize("estimator, trials", [
+    (EstimatorMode.STANDARD, 2),
+    (EstimatorMode.STRATIFIED, 2),
+    (EstimatorMode.ANTITHETIC, 4),
+])
+def test_run_cell_reports_nonzero_se_at_minimum_trials(estimator, trials):
+    np.random.seed(5)
+    result = BingoSimulator.run_cell(5, 75, 1, trials, BingoMode.PURE_MATH, estimator)
+    assert result["games"] == trials
+    assert result["se"] > 0
@@ -0,0 +1,135 @@
+import asyncio
+import http.client
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+
+import pytest
+
+from bingo_service import BingoServiceClient, BingoSimulationServer, make_cell
+
+
+@pytest.fixture
+def server():
+    srv = BingoSimulationServer(port=0, workers=2)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(srv.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield srv
+    asyncio.run_coroutine_threadsafe(srv.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def client(server):
+    return BingoServiceClient(port=server.port, timeout=60)
+
+
+def test_rejects_non_local_host():
+    with pytest.raises(ValueError):
+        BingoSimulationServer(host="0.0.0.0")
+    with pytest.raises(ValueError):
+        BingoServiceClient(host="192.168.1.10")
+
+
+def test_repeated_cell_is_served_from_cache(server, client):
+    first = client.run_cell(3, 20, 2, 30)
+    second = client.run_cell(3, 20, 2, 30)
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["turns"] == first["turns"]
+    assert server.stats["computed"] == 1
+    assert server.stats["cache_hits"] == 1
+
+
+def test_fresh_cell_bypasses_cache(server, client):
+    client.run_cell(3, 20, 2, 30)
+    fresh = client.run_cell(3, 20, 2, 30, fresh=True)
+
+    assert fresh["cached"] is False
+    assert server.stats["computed"] == 2
+    assert server.stats["cache_hits"] == 0
+
+
+def test_sweep_coalesces_identical_inflight_cells(server, client):
+    cells = [make_cell(3, 20, 2, 40), make_cell(3, 20, 2, 40), make_cell(3, 20, 5, 40)]
+    results = {r["index"]: r for r in client.sweep(cells)}
+
+    assert server.stats["coalesced"] == 1
+    assert server.stats["computed"] == 2
+    assert results[0]["turns"] == results[1]["turns"]
+
+
+def test_sweep_streams_one_line_per_cell_with_index(client):
+    trials = [10, 12, 14, 16]
+    cells = [make_cell(3, 20, 2, t) for t in trials]
+    results = list(client.sweep(cells))
+
+    assert sorted(r["index"] for r in results) == [0, 1, 2, 3]
+    for r in results:
+        assert r["games"] == trials[r["index"]]
+
+
+def test_validation_error_is_raised_as_value_error(client):
+    with pytest.raises(ValueError):
+        client.run_cell(5, 10, 1, 10)
+    with pytest.raises(ValueError):
+        list(client.sweep([make_cell(3, 20, 2, 10), make_cell(5, 10, 1, 10)]))
+
+
+def test_worker_failure_is_reported_per_cell(server, client):
+    # Pool ที่ปิดไปแล้วรับงานใหม่ไม่ได้ เหมือนกรณี Worker ตาย
+    server._pool.shutdown()
+    with pytest.raises(RuntimeError):
+        client.run_cell(3, 20, 2, 10)
+    with pytest.raises(RuntimeError):
+        list(client.sweep([make_cell(3, 20, 2, 10)]))
+
+
+def test_service_recovers_after_worker_is_killed(server, client):
+    client.run_cell(3, 20, 2, 10)
+    pool = server._pool
+    os.kill(next(iter(pool._processes)), signal.SIGKILL)
+
+    # รอจน Executor ตรวจพบว่า Worker ตาย ไม่งั้นคำขอถัดไปอาจได้ Worker ที่ยังเหลืออยู่
+    deadline = time.monotonic() + 10
+    while not pool._broken and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    result = client.run_cell(3, 20, 2, 12)
+    assert result["games"] == 12
+    assert server.stats["pool_restarts"] == 1
+    assert client.run_cell(3, 20, 2, 14)["games"] == 14
+
+
+def test_non_object_body_returns_400(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    conn.request("POST", "/sweep", body=json.dumps([1]), headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    assert resp.status == 400
+    assert "error" in json.loads(resp.read())
+    conn.close()
+
+
+class _TruncatedSweepHandler(socketserver.StreamRequestHandler):
+    """จำลอง Service ที่ส่งผลมาแค่ช่องเดียวแล้วตัดการเชื่อมต่อ"""
+    def handle(self):
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        self.wfile.write(json.dumps({"index": 0, "mean": 1.0}).encode("utf-8") + b"\n")
+
+
+def test_client_raises_when_stream_is_cut_short():
+    with socketserver.TCPServer(("127.0.0.1", 0), _TruncatedSweepHandler) as fake:
+        threading.Thread(target=fake.handle_request, daemon=True).start()
+        client = BingoServiceClient(port=fake.server_address[1], timeout=10)
+        with pytest.raises(ConnectionError):
+            list(client.sweep([make_cell(3, 20, 2, 10), make_cell(3, 20, 2, 12)]))
@@ -0,0 +1,143 @@
+import math
+
+import numpy as np
+import pytest
+
+import bingo_surface
+from bingo_core import BingoMode, BingoSimulator, EstimatorMode
+from bingo_surface import BingoLookupSurface
+
+N_VALS = [5]
+Y_VALS = [50, 75, 100, 125]
+X_VALS = [1, 10, 100, 1000]
+
+
+def make_surface(func, se=0.0):
+    """ตารางสังเคราะห์ mean = func(y, log x) ไม่ต้องจำลองจริง"""
+    shape = (1, len(N_VALS), len(Y_VALS), len(X_VALS))
+    mean = np.zeros(shape)
+    for yi, y in enumerate(Y_VALS):
+        for xi, x in enumerate(X_VALS):
+            mean[0, 0, yi, xi] = func(y, math.log(x))
+    return BingoLookupSurface(N_VALS, Y_VALS, X_VALS, [BingoMode.PURE_MATH], mean,
+                              np.ones(shape), np.full(shape, se), trials=100)
+
+
+def test_lookup_is_exact_for_linear_surface():
+    surface = make_surface(lambda y, lx: 0.5 * y - 3.0 * lx)
+    result = surface.lookup(5, 60, 30, BingoMode.PURE_MATH)
+
+    assert result["mean"] == pytest.approx(0.5 * 60 - 3.0 * math.log(30), abs=1e-4)
+    assert result["error"] == pytest.approx(0.0, abs=1e-4)
+
+
+def test_error_bound_covers_curvature_and_is_tight():
+    func = lambda y, lx: 0.002 * y ** 2 + 0.8 * lx ** 2
+    surface = make_surface(func, se=0.1)
+    result = surface.lookup(5, 60, 30, BingoMode.PURE_MATH)
+
+    actual = abs(result["mean"] - func(60, math.log(30)))
+    spread = func(75, math.log(100)) - func(50, math.log(10))
+    assert actual <= result["error"] <= actual + 2 * 0.1 + 1e-3
+    assert result["error"] < spread / 4
+
+
+def test_lookup_outside_grid_or_unplayable_returns_none():
+    surface = make_surface(lambda y, lx: y)
+    assert surface.lookup(4, 60, 30, BingoMode.PURE_MATH) is None
+    assert surface.lookup(5, 40, 30, BingoMode.PURE_MATH) is None
+    assert surface.lookup(5, 60, 5000, BingoMode.PURE_MATH) is None
+    assert surface.lookup(5, 60, 30, BingoMode.FREE_SPACE) is None
+
+    surface.mean[0, 0, 0, :] = np.nan
+    assert surface.lookup(5, 60, 30, BingoMode.PURE_MATH) is None
+
+
+def test_estimate_falls_back_to_simulation_above_tolerance():
+    surface = make_surface(lambda y, lx: 0.002 * y ** 2 + 0.8 * lx ** 2, se=0.1)
+    assert surface.estimate(5, 60, 30, BingoMode.PURE_MATH, tolerance=100)["source"] == "surface"
+
+    np.random.seed(0)
+    result = surface.estimate(5, 60, 3, BingoMode.PURE_MATH, tolerance=0.01, trials=5)
+    assert result["source"] == "simulation"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    surface = make_surface(lambda y, lx: y + lx)
+    path = tmp_path / "surface.npz"
+    surface.save(str(path))
+    loaded = BingoLookupSurface.load(str(path))
+
+    assert loaded.modes == surface.modes
+    assert loaded.trials == surface.trials
+    np.testing.assert_array_equal(loaded.mean, surface.mean)
+    np.testing.assert_array_equal(loaded.done, surface.done)
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def test_build_resumes_from_checkpoint(tmp_path, monkeypatch):
+    path = str(tmp_path / "surface.npz")
+    grid = dict(n_vals=[3], y_vals=[9, 12], x_vals=[1, 2], modes=[BingoMode.PURE_MATH], trials=4)
+
+    def stop_after_first_row(done, total):
+        raise _Interrupted()
+
+    np.random.seed(0)
+    with pytest.raises(_Interrupted):
+        BingoLookupSurface.build(**grid, checkpoint=path, progress=stop_after_first_row)
+    partial = BingoLookupSurface.load(path)
+    assert partial.done.tolist() == [[[True, False]]]
+
+    calls = []
+    run_cell = bingo_surface.BingoSimulator.run_cell
+    monkeypatch.setattr(bingo_surface.BingoSimulator, "run_cell",
+                        lambda n, y, *args: calls.append(y) or run_cell(n, y, *args))
+    surface = BingoLookupSurface.build(**grid, checkpoint=path, resume=True)
+
+    assert calls == [12, 12]
+    assert surface.done.all()
+    np.testing.assert_array_equal(surface.mean[0, 0, 0], partial.mean[0, 0, 0])
+    assert not np.isnan(surface.mean).any()
+
+
+@pytest.mark.parametrize("changed", [dict(trials=8), dict(estimator=EstimatorMode.ANTITHETIC)])
+def test_build_resume_rejects_different_grid(tmp_path, changed):
+    path = str(tmp_path / "surface.npz")
+    grid = dict(n_vals=[3], y_vals=[9], x_vals=[1], modes=[BingoMode.PURE_MATH], trials=4)
+    np.random.seed(0)
+    BingoLookupSurface.build(**grid, checkpoint=path)
+    assert BingoLookupSurface.load(path).estimator == EstimatorMode.STANDARD
+
+    with pytest.raises(ValueError):
+        BingoLookupSurface.build(**dict(grid, **changed), checkpoint=path, resume=True)
+
+
+class _ReversedLocalClient:
+    """แทน BingoServiceClient: คำนวณในเครื่องแล้วส่งผลกลับแบบย้อนลำดับ เหมือน Service ที่เสร็จไม่ตามลำดับ"""
+    def __init__(self):
+        self.cells = []
+
+    def sweep(self, cells):
+        self.cells = list(cells)
+        for index in reversed(range(len(cells))):
+            c = cells[index]
+            result = BingoSimulator.run_cell(c["n"], c["y"], c["players"], c["trials"], c["mode"], c["estimator"])
+            yield dict(result, index=index)
+
+
+def test_build_through_client_sends_all_rows_at_once(tmp_path):
+    path = str(tmp_path / "surface.npz")
+    client = _ReversedLocalClient()
+    np.random.seed(0)
+    surface = BingoLookupSurface.build([3], [8, 9, 12], [1, 2], modes=[BingoMode.PURE_MATH], trials=4,
+                                       client=client, checkpoint=path)
+
+    # y=8 เล่นไม่ได้ในโหมด Pure Math (ต้องมีอย่างน้อย 9 ตัว) จึงส่งไปแค่ 2 แถว x 2 ช่อง
+    assert [(c["y"], c["players"]) for c in client.cells] == [(9, 1), (9, 2), (12, 1), (12, 2)]
+    assert surface.done.all()
+    assert np.isnan(surface.mean[0, 0, 0]).all()
+    assert not np.isnan(surface.mean[0, 0, 1:]).any()
+    np.testing.assert_array_equal(BingoLookupSurface.load(path).mean, surface.mean)